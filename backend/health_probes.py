@@ -0,0 +1,168 @@
+"""
+Active health probes for monitored services.
+
+Process-table matching only proves a process exists; a hung service still
+looks "running". Each collector tick the prober opens a TCP connection (or
+sends an HTTP GET) to every target port concurrently on the event loop, with
+a hard per-probe timeout, and keeps a short latency window per target for
+percentiles.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+# "localhost" resolves to both ::1 and 127.0.0.1 and open_connection tries each,
+# so services bound to only one of them (e.g. Vite on macOS -> ::1) still answer
+PROBE_HOST = os.getenv("PROBE_HOST", "localhost")
+PROBE_TIMEOUT_SECONDS = float(os.getenv("PROBE_TIMEOUT_SECONDS", 2.0))
+PROBE_HISTORY_SIZE = 120  # ~10 minutes at one probe per 5s tick
+
+
+class ProbeError(Exception):
+    """Service answered, but not with a healthy response"""
+
+
+class ProbeTarget(NamedTuple):
+    name: str  # matches ProcessStatus.name
+    port: int  # fallback when the scan found nothing; see resolve_probe_ports()
+    kind: str = "tcp"  # "tcp" or "http"
+    path: str = "/"
+
+
+def probe_targets(dashboard_port: int) -> List[ProbeTarget]:
+    """Probed services; `dashboard_port` is the port this backend listens on"""
+    return [
+        ProbeTarget("OpenClaw Gateway", 18789),
+        ProbeTarget("Ollama", 11434, "http", "/api/version"),
+        ProbeTarget("Monitoring Dashboard", dashboard_port, "http", "/api/health"),
+        ProbeTarget("Knowledge Graph API", 8000, "http"),
+        ProbeTarget("Knowledge Graph UI", 5173, "http"),
+        ProbeTarget("Personal Dashboard", 8000, "http"),
+    ]
+
+
+async def _close(writer: asyncio.StreamWriter):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (ConnectionError, OSError):
+        pass
+
+
+async def _tcp_check(host: str, port: int):
+    _, writer = await asyncio.open_connection(host, port)
+    await _close(writer)
+
+
+async def _http_check(host: str, port: int, path: str):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"User-Agent: host-monitoring-probe\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+    finally:
+        await _close(writer)
+
+    parts = status_line.split()
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+        raise ProbeError("invalid HTTP response")
+    status = int(parts[1])
+    # Any non-5xx answer means the service is up and serving requests
+    if status >= 500:
+        raise ProbeError(f"HTTP {status}")
+
+
+async def probe_port(host: str, port: int, kind: str = "tcp", path: str = "/",
+                     timeout: float = PROBE_TIMEOUT_SECONDS) -> Tuple[bool, float, Optional[str]]:
+    """Probe one port; returns (healthy, latency_ms, error)"""
+    start = time.perf_counter()
+    try:
+        check = _http_check(host, port, path) if kind == "http" else _tcp_check(host, port)
+        await asyncio.wait_for(check, timeout=timeout)
+        return True, round((time.perf_counter() - start) * 1000, 2), None
+    except asyncio.TimeoutError:
+        return False, round((time.perf_counter() - start) * 1000, 2), "timeout"
+    except ProbeError as e:
+        return False, round((time.perf_counter() - start) * 1000, 2), str(e)
+    except (OSError, ValueError) as e:
+        # Exception type only ("ConnectionRefusedError"): samples are stored per tick
+        return False, round((time.perf_counter() - start) * 1000, 2), type(e).__name__
+
+
+def resolve_probe_ports(targets: List[ProbeTarget], found: Dict[str, Optional[int]]) -> Dict[str, int]:
+    """Port to probe per target name; targets whose port can't be attributed to them are left out
+
+    `found` maps process names to the port the collector's scan found (None if
+    not found). A default port is only used if no other target shares it and
+    no scanned process owns it, otherwise the probe would report the health of
+    a different service (Knowledge Graph API and Personal Dashboard both
+    default to 8000).
+    """
+    claimed = {port for port in found.values() if port}
+    defaults = Counter(t.port for t in targets)
+    ports = {}
+    for target in targets:
+        port = found.get(target.name)
+        if port:
+            ports[target.name] = port
+        elif defaults[target.port] == 1 and target.port not in claimed:
+            ports[target.name] = target.port
+    return ports
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list, rounded to 2 decimals"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+
+class HealthProber:
+    """Runs all probes concurrently and keeps a latency window per target"""
+
+    def __init__(self, targets: List[ProbeTarget], host: str = PROBE_HOST,
+                 timeout: float = PROBE_TIMEOUT_SECONDS):
+        self.targets = targets
+        self.host = host
+        self.timeout = timeout
+        # (latency_ms, healthy) per probe; failures count as a full timeout
+        self._window: Dict[str, Deque[Tuple[float, bool]]] = {
+            t.name: deque(maxlen=PROBE_HISTORY_SIZE) for t in targets
+        }
+
+    async def _probe_target(self, target: ProbeTarget, port: int) -> Dict:
+        healthy, latency_ms, error = await probe_port(self.host, port, target.kind, target.path, self.timeout)
+
+        # A refused or timed-out probe is as bad as the slowest answer we accept,
+        # so failures enter the percentiles at the timeout value
+        window = self._window[target.name]
+        window.append((latency_ms if healthy else self.timeout * 1000, healthy))
+        ordered = sorted(latency for latency, _ in window)
+        failures = sum(1 for _, ok in window if not ok)
+        return {
+            "kind": target.kind,
+            "port": port,
+            "healthy": healthy,
+            "latency_ms": latency_ms if healthy else None,
+            "error": error,
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+            "failure_rate": round(failures / len(window), 4),
+            "samples": len(ordered),
+        }
+
+    async def run(self, found: Dict[str, Optional[int]]) -> Dict[str, Dict]:
+        """Probe every target whose port is known once; returns {target name: probe status}"""
+        ports = resolve_probe_ports(self.targets, found)
+        targets = [t for t in self.targets if t.name in ports]
+        results = await asyncio.gather(*(self._probe_target(t, ports[t.name]) for t in targets))
+        return {target.name: result for target, result in zip(targets, results)}
@@ -0,0 +1,176 @@
+"""
+Streaming serializers for metrics history export.
+
+Every serializer consumes an iterator of history samples and yields encoded
+byte chunks of at most `chunk_samples` samples each, so memory stays flat no
+matter how long the exported range is. Tabular formats (CSV, Parquet, Arrow)
+use a long layout: one row per process per sample, with the sample's system
+fields repeated on each row.
+"""
+
+import csv
+import io
+import json
+import typing
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+EXPORT_CHUNK_SAMPLES = 500
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# (column name, path into the system/process dict, python type)
+Column = Tuple[str, Tuple[str, ...], type]
+
+
+def _unwrap_optional(annotation):
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        return args[0]
+    return annotation
+
+
+def model_columns(model: Type[BaseModel], prefix: str, exclude: Iterable[str] = ()) -> List[Column]:
+    """Flatten a Pydantic model into export columns, recursing into nested models"""
+    columns = []
+    for name, field in model.model_fields.items():
+        if name in exclude:
+            continue
+        annotation = _unwrap_optional(field.annotation)
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            for sub_name, path, kind in model_columns(annotation, f"{prefix}{name}_"):
+                columns.append((sub_name, (name,) + path, kind))
+        elif annotation in (bool, int, float, str):
+            columns.append((f"{prefix}{name}", (name,), annotation))
+        else:
+            # Lists / dicts are exported as JSON text
+            columns.append((f"{prefix}{name}", (name,), dict))
+    return columns
+
+
+def _lookup(data: Optional[Dict], path: Tuple[str, ...]):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    if isinstance(data, (dict, list)):
+        return json.dumps(data, separators=(",", ":"))
+    return data
+
+
+def _chunks(samples: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    while True:
+        chunk = list(islice(samples, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _rows(chunk: List[Dict], system_columns: List[Column], process_columns: List[Column]) -> Iterator[Dict]:
+    for sample in chunk:
+        base = {"timestamp": sample["timestamp"]}
+        system = sample.get("system")
+        for name, path, _ in system_columns:
+            base[name] = _lookup(system, path)
+
+        for proc in sample.get("processes") or [None]:
+            row = dict(base)
+            for name, path, _ in process_columns:
+                row[name] = _lookup(proc, path)
+            yield row
+
+
+def iter_ndjson(samples: Iterator[Dict], chunk_samples: int = EXPORT_CHUNK_SAMPLES) -> Iterator[bytes]:
+    """One JSON document per sample, nested exactly as stored"""
+    for chunk in _chunks(samples, chunk_samples):
+        yield "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in chunk).encode()
+
+
+def iter_csv(samples: Iterator[Dict], system_columns: List[Column], process_columns: List[Column],
+             chunk_samples: int = EXPORT_CHUNK_SAMPLES) -> Iterator[bytes]:
+    fieldnames = ["timestamp"] + [c[0] for c in system_columns] + [c[0] for c in process_columns]
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames)
+    writer.writeheader()
+    for chunk in _chunks(samples, chunk_samples):
+        writer.writerows(_rows(chunk, system_columns, process_columns))
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    # Header only, for an empty range
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever pyarrow wrote since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(pa, system_columns: List[Column], process_columns: List[Column]):
+    types = {bool: pa.bool_(), int: pa.int64(), float: pa.float64(), str: pa.string(), dict: pa.string()}
+    fields = [pa.field("timestamp", pa.float64())]
+    fields += [pa.field(name, types[kind]) for name, _, kind in system_columns + process_columns]
+    return pa.schema(fields)
+
+
+def iter_arrow(samples: Iterator[Dict], system_columns: List[Column], process_columns: List[Column],
+               fmt: str = "parquet", chunk_samples: int = EXPORT_CHUNK_SAMPLES) -> Iterator[bytes]:
+    """Parquet (one row group per chunk) or Arrow IPC stream (one record batch per chunk)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, system_columns, process_columns)
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    try:
+        for chunk in _chunks(samples, chunk_samples):
+            table = pa.Table.from_pylist(list(_rows(chunk, system_columns, process_columns)), schema=schema)
+            writer.write_table(table)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
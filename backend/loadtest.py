@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Offline load test for /ws/metrics and /api/metrics/history.
+
+Starts the backend on localhost with a stubbed collector (synthetic samples,
+no psutil scans or health probes), connects many authenticated WebSocket
+clients spread over several client processes, mixes in history polling, and
+reports frame-delivery latency, dropped frames and server CPU / memory.
+
+    python loadtest.py --clients 1000 --duration 60
+    python loadtest.py --clients 2000 --workers 4 --client-procs 8
+
+Latency is measured from the sample's collection timestamp to its arrival at
+the client, so it includes recording, fan-out order and client scheduling.
+A frame counts as dropped when a client connected for the whole measurement
+window never receives a sample that some client did receive, or receives it
+more than a few seconds after the window closes.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from health_probes import percentile
+
+CF_HEADERS = {"CF-Access-Authenticated-User-Email": "loadtest@example.com"}
+
+# An overloaded server may stall a history poll; count it as an error instead
+POLL_TIMEOUT_SECONDS = 30.0
+
+STUB_PROCESS_NAMES = [
+    "OpenClaw Gateway", "OpenClaw Node", "OpenClaw TUI", "Ollama", "Cloudflared",
+    "Monitoring Dashboard", "Knowledge Graph API", "Knowledge Graph UI", "Personal Dashboard",
+]
+
+
+def raise_fd_limit():
+    """Thousands of sockets need more than the usual 1024 descriptors"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+# ---------------------------------------------------------------------------
+# Server side: the real app with a stubbed collector
+# ---------------------------------------------------------------------------
+
+def synthetic_sample(timestamp: float, seq: Optional[int]) -> Dict:
+    """A sample shaped (and sized) like a real one, built from the app's models"""
+    import main
+
+    system = main.SystemMetrics(
+        timestamp=timestamp, cpu_percent=12.5, memory_percent=48.1, memory_used_gb=7.7,
+        memory_total_gb=16.0, disk_percent=61.3, disk_used_gb=293.4, disk_total_gb=478.9,
+        boot_time=timestamp - 86400,
+    )
+    probe = main.ProbeStatus(kind="http", port=8000, healthy=True, latency_ms=1.2,
+                             p50_ms=1.1, p95_ms=2.4, p99_ms=3.9, failure_rate=0.0, samples=120)
+    processes = [
+        main.ProcessStatus(
+            name=name, running=True, pid=1000 + i, port=8000 + i, cpu_percent=1.5,
+            memory_percent=0.8, uptime_seconds=3600.0,
+            cmdline=f"/usr/local/bin/python -m uvicorn app:main --port {8000 + i} --workers 1",
+            probe=probe,
+        )
+        for i, name in enumerate(STUB_PROCESS_NAMES)
+    ]
+    return {
+        "timestamp": timestamp,
+        "seq": seq,
+        "system": system.model_dump(),
+        "processes": [p.model_dump() for p in processes],
+    }
+
+
+class _NoProbes:
+    async def run(self, found: Dict[str, Optional[int]]) -> Dict[str, Dict]:
+        return {}
+
+
+def install_stub_collector(interval: float):
+    """Replace the psutil-backed collection in `main` with synthetic samples"""
+    import main
+    from process_explorer import RANK_KEYS
+
+    tick = {"seq": 0}
+
+    def collect_tick():
+        tick["seq"] += 1
+        now = time.time()
+        snapshot = {"timestamp": now, "process_count": 0,
+                    "rankings": {k: [] for k in RANK_KEYS}, "ranked": {k: 0 for k in RANK_KEYS}}
+        return synthetic_sample(now, tick["seq"]), snapshot
+
+    main.COLLECT_INTERVAL_SECONDS = interval
+    main.collect_tick = collect_tick
+    # Initial frame before the first tick; no seq, so clients ignore it
+    main.collect_metrics = lambda: synthetic_sample(time.time(), None)
+    main.health_prober = _NoProbes()
+
+
+def prefill(append, hours: float):
+    """Seed `hours` of history at the real 5s cadence so history polls do real work"""
+    now = time.time()
+    count = int(hours * 3600 / 5)
+    for i in range(count):
+        append(synthetic_sample(now - (count - i) * 5, None))
+
+
+def run_stub_collector(name: str, interval: float):
+    """Multi-worker mode: the shared collector process, stubbed"""
+    import main
+
+    install_stub_collector(interval)
+    main.run_shared_collector(name)
+
+
+def serve(args):
+    import uvicorn
+    import main
+
+    raise_fd_limit()
+    if args.workers <= 1:
+        install_stub_collector(args.interval)
+        prefill(main.metrics_history.append, args.prefill_hours)
+        uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning",
+                    access_log=False, backlog=4096)
+        return
+
+    # Same layout as `python main.py` with BACKEND_WORKERS > 1
+    main.serve_multi_worker(
+        args.port, args.workers, collector_target=run_stub_collector, collector_args=(args.interval,),
+        prepare=lambda ring: prefill(ring.append, args.prefill_hours),
+        host="127.0.0.1", log_level="warning", access_log=False, backlog=4096,
+    )
+
+
+def start_server(args) -> subprocess.Popen:
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--serve",
+        "--port", str(args.port), "--workers", str(args.workers),
+        "--interval", str(args.interval), "--prefill-hours", str(args.prefill_hours),
+    ]
+    # The auth layer prints per request; keep that off the report
+    server = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {server.returncode}")
+        try:
+            status, _ = asyncio.run(http_get("127.0.0.1", args.port, "/api/health", {}))
+            if status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.5)
+    server.kill()
+    raise RuntimeError("Server did not become healthy within 60s")
+
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+class ServerMonitor(threading.Thread):
+    """Samples CPU and RSS of the server process tree once per second"""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.samples: List[Tuple[float, float, int]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        tracked: Dict[int, psutil.Process] = {}
+        while not self._stop_event.wait(1.0):
+            try:
+                root = psutil.Process(self.pid)
+                tree = [root] + root.children(recursive=True)
+            except psutil.NoSuchProcess:
+                return
+            cpu = 0.0
+            rss = 0
+            for proc in tree:
+                # Reuse Process objects so cpu_percent() measures since the last sample
+                proc = tracked.setdefault(proc.pid, proc)
+                try:
+                    cpu += proc.cpu_percent()
+                    rss += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            self.samples.append((time.time(), cpu, rss))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+async def _http_get(host: str, port: int, path: str, headers: Dict[str, str]) -> bytes:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        await writer.drain()
+        return await reader.read()
+    finally:
+        writer.close()
+
+
+async def http_get(host: str, port: int, path: str, headers: Dict[str, str],
+                   timeout: float = POLL_TIMEOUT_SECONDS) -> Tuple[int, int]:
+    """Minimal HTTP/1.1 GET; returns (status, response bytes)
+
+    Raises asyncio.TimeoutError, OSError, or ValueError for an empty or
+    malformed reply.
+    """
+    response = await asyncio.wait_for(_http_get(host, port, path, headers), timeout=timeout)
+    parts = response.split(b" ", 2)
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+        raise ValueError(f"malformed HTTP response ({len(response)} bytes)")
+    return int(parts[1]), len(response)
+
+
+def ws_connect(url: str, headers: Dict[str, str]):
+    import websockets
+
+    # websockets renamed extra_headers to additional_headers in its new client
+    params = inspect.signature(websockets.connect).parameters
+    key = "additional_headers" if "additional_headers" in params else "extra_headers"
+    return websockets.connect(url, open_timeout=30, max_size=None, **{key: headers})
+
+
+async def ws_client(url: str, connect_at: float, window: Tuple[float, float], grace: float, stats: Dict):
+    """One viewer: records latency and sequence numbers of frames collected in the window"""
+    from websockets.exceptions import ConnectionClosed
+
+    measure_start, measure_end = window
+    await asyncio.sleep(max(0.0, connect_at - time.time()))
+    try:
+        ws = await ws_connect(url, CF_HEADERS)
+    except Exception:
+        stats["connect_errors"] += 1
+        return
+
+    seqs = set()
+    try:
+        async with ws:
+            while True:
+                remaining = measure_end + grace - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                received = time.time()
+                if message == "ping":
+                    await ws.send("pong")
+                    continue
+
+                frame = json.loads(message)
+                seq = frame.get("seq")
+                if seq is None or seq in seqs or not measure_start <= frame["timestamp"] < measure_end:
+                    continue
+                seqs.add(seq)
+                stats["latencies_ms"].append((received - frame["timestamp"]) * 1000)
+    except ConnectionClosed:
+        stats["disconnects"] += 1
+
+    stats["received"].append(len(seqs))
+    if seqs:
+        stats["min_seq"] = min(stats["min_seq"] or min(seqs), min(seqs))
+        stats["max_seq"] = max(stats["max_seq"] or 0, max(seqs))
+
+
+async def history_poller(host: str, port: int, path: str, interval: float,
+                         window: Tuple[float, float], stats: Dict):
+    measure_start, measure_end = window
+    await asyncio.sleep(max(0.0, measure_start - time.time()))
+    while time.time() < measure_end:
+        started = time.perf_counter()
+        try:
+            status, _ = await http_get(host, port, path, CF_HEADERS)
+            stats["poll_latencies_ms"].append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                stats["poll_errors"] += 1
+        except (OSError, ValueError, asyncio.TimeoutError):
+            # A single bad poll must not abort the whole client process
+            stats["poll_errors"] += 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+async def run_clients(spec: Dict) -> Dict:
+    stats = {
+        "connect_errors": 0, "disconnects": 0, "received": [], "latencies_ms": [],
+        "min_seq": None, "max_seq": None, "poll_latencies_ms": [], "poll_errors": 0,
+    }
+    url = f"ws://127.0.0.1:{spec['port']}/ws/metrics"
+    window = (spec["measure_start"], spec["measure_end"])
+    clients = spec["clients"]
+    # Spread connects evenly over the ramp-up so the accept queue is not flooded
+    ramp_step = spec["ramp"] / max(clients, 1)
+    tasks = [
+        ws_client(url, spec["ramp_start"] + i * ramp_step, window, spec["grace"], stats)
+        for i in range(clients)
+    ]
+    tasks += [
+        history_poller("127.0.0.1", spec["port"], f"/api/metrics/history?hours={spec['poll_hours']}",
+                       spec["poll_interval"], window, stats)
+        for _ in range(spec["pollers"])
+    ]
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def client_process(spec: Dict) -> Dict:
+    raise_fd_limit()
+    return asyncio.run(run_clients(spec))
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def split(total: int, parts: int) -> List[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def summarize(results: List[Dict], monitor: ServerMonitor, window: Tuple[float, float], args) -> Dict:
+    latencies = sorted(l for r in results for l in r["latencies_ms"])
+    poll_latencies = sorted(l for r in results for l in r["poll_latencies_ms"])
+    min_seqs = [r["min_seq"] for r in results if r["min_seq"] is not None]
+    max_seqs = [r["max_seq"] for r in results if r["max_seq"] is not None]
+    frames_sent = max(max_seqs) - min(min_seqs) + 1 if min_seqs else 0
+    received = [n for r in results for n in r["received"]]
+    expected = frames_sent * len(received)
+
+    in_window = [s for s in monitor.samples if window[0] <= s[0] <= window[1]]
+    cpu = [s[1] for s in in_window]
+    rss = [s[2] for s in in_window]
+
+    return {
+        "clients": args.clients,
+        "workers": args.workers,
+        "interval_s": args.interval,
+        "duration_s": args.duration,
+        "connected": len(received),
+        "connect_errors": sum(r["connect_errors"] for r in results),
+        "disconnects": sum(r["disconnects"] for r in results),
+        "frames_per_client": frames_sent,
+        "frames_received": sum(received),
+        "frames_dropped": expected - sum(received),
+        "drop_rate": round((expected - sum(received)) / expected, 6) if expected else None,
+        "latency_ms": {"p50": percentile(latencies, 50), "p99": percentile(latencies, 99),
+                       "max": round(latencies[-1], 2) if latencies else None},
+        "history_polls": len(poll_latencies),
+        "history_poll_errors": sum(r["poll_errors"] for r in results),
+        "history_latency_ms": {"p50": percentile(poll_latencies, 50), "p99": percentile(poll_latencies, 99)},
+        "server_cpu_percent": {"avg": round(sum(cpu) / len(cpu), 1) if cpu else None,
+                               "max": round(max(cpu), 1) if cpu else None},
+        "server_rss_mb_max": round(max(rss) / (1024 ** 2), 1) if rss else None,
+    }
+
+
+def print_report(report: Dict):
+    latency = report["latency_ms"]
+    history = report["history_latency_ms"]
+    cpu = report["server_cpu_percent"]
+    print()
+    print(f"Clients     {report['connected']}/{report['clients']} connected, "
+          f"{report['connect_errors']} connect errors, {report['disconnects']} disconnects")
+    print(f"Frames      {report['frames_per_client']} per client, {report['frames_received']} received, "
+          f"{report['frames_dropped']} dropped (rate {report['drop_rate']})")
+    print(f"Delivery    p50 {latency['p50']} ms, p99 {latency['p99']} ms, max {latency['max']} ms")
+    print(f"History     {report['history_polls']} polls, {report['history_poll_errors']} errors, "
+          f"p50 {history['p50']} ms, p99 {history['p99']} ms")
+    print(f"Server      CPU avg {cpu['avg']}% / max {cpu['max']}% (all cores), "
+          f"RSS max {report['server_rss_mb_max']} MB (summed over processes)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500, help="WebSocket clients (default: 500)")
+    parser.add_argument("--client-procs", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processes the clients are spread over")
+    parser.add_argument("--duration", type=float, default=30, help="Measurement window in seconds")
+    parser.add_argument("--ramp", type=float, default=10, help="Seconds to connect all clients")
+    parser.add_argument("--interval", type=float, default=1.0, help="Stub collector interval in seconds")
+    parser.add_argument("--pollers", type=int, default=10, help="Concurrent history pollers")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between polls per poller")
+    parser.add_argument("--poll-hours", type=int, default=24, help="`hours` query for history polls")
+    parser.add_argument("--prefill-hours", type=float, default=24, help="Synthetic history seeded at startup")
+    parser.add_argument("--workers", type=int, default=1, help="Backend workers (>1 uses the shared collector)")
+    parser.add_argument("--port", type=int, default=18099)
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return
+
+    raise_fd_limit()
+    print(f"Starting backend on port {args.port} ({args.workers} worker(s), stub interval {args.interval}s)...")
+    server = start_server(args)
+    monitor = ServerMonitor(server.pid)
+    monitor.start()
+
+    procs = max(1, min(args.client_procs, args.clients or 1))
+    ramp_start = time.time() + 3  # time for client processes to spawn
+    measure_start = ramp_start + args.ramp + 2
+    measure_end = measure_start + args.duration
+    specs = [
+        {
+            "port": args.port, "clients": clients, "pollers": pollers, "ramp": args.ramp,
+            "ramp_start": ramp_start, "measure_start": measure_start, "measure_end": measure_end,
+            "grace": max(5.0, args.interval * 5), "poll_interval": args.poll_interval,
+            "poll_hours": args.poll_hours,
+        }
+        for clients, pollers in zip(split(args.clients, procs), split(args.pollers, procs))
+    ]
+    print(f"Connecting {args.clients} clients over {args.ramp}s from {procs} process(es), "
+          f"measuring for {args.duration}s...")
+
+    try:
+        with ProcessPoolExecutor(max_workers=procs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(client_process, specs))
+    finally:
+        monitor.stop()
+        stop_server(server)
+
+    report = summarize(results, monitor, (measure_start, measure_end), args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,32 @@
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 import psutil
 import asyncio
+import multiprocessing
+import shutil
+import signal
+import threading
 import json
 import os
 import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import uvicorn
+from shared_history import RingNotifier, RingSubscriber, SharedHistoryRing, notify_dir, ring_bytes
+from history_export import (
+    EXPORT_MEDIA_TYPES, arrow_available, iter_arrow, iter_csv, iter_ndjson, model_columns
+)
+from health_probes import HealthProber, probe_targets
+from process_explorer import (
+    ALL_RANK_KEYS, RANK_KEYS, TOP_PROCESSES_MAX, ProcessSampler, take_top_snapshot
+)
 
 # Load .env from the project root (parent of backend directory)
 env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
@@ -19,11 +34,37 @@ load_dotenv(env_path)
 
 # Configuration
 DATA_RETENTION_HOURS = 24 * 7  # 7 days
+COLLECT_INTERVAL_SECONDS = 5
+BACKEND_PORT = int(os.getenv("BACKEND_PORT", 18081))
+
+# Multi-worker mode: one collector process writes into a shared-memory ring,
+# every uvicorn worker attaches to it by name (set automatically by __main__)
+BACKEND_WORKERS = int(os.getenv("BACKEND_WORKERS", 1))
+SHARED_HISTORY_NAME = os.getenv("SHARED_HISTORY_NAME")
+SHARED_HISTORY_SLOT_BYTES = int(os.getenv("SHARED_HISTORY_SLOT_BYTES", 6144))
+# Workers are woken by the collector after every write; this is only the
+# fallback re-check interval in case a wake-up datagram is lost
+SHARED_HISTORY_POLL_SECONDS = float(os.getenv("SHARED_HISTORY_POLL_SECONDS", 1.0))
+SHARED_TOP_SLOT_BYTES = 256 * 1024
+# More collector crashes than this within the window shut the server down
+COLLECTOR_MAX_RESTARTS = 3
+COLLECTOR_RESTART_WINDOW_SECONDS = 60
 
 # Global state
 metrics_history: List[Dict] = []
+shared_history: Optional[SharedHistoryRing] = None
+history_notifier: Optional[RingNotifier] = None
 active_connections: List[WebSocket] = []
 
+# Top-N process explorer: one snapshot per tick, shared by all viewers
+process_sampler = ProcessSampler()
+top_processes: Optional[Dict] = None
+shared_top_processes: Optional[SharedHistoryRing] = None
+process_connections: Dict[WebSocket, Tuple[str, int]] = {}
+
+# Active health probes, run concurrently with each collection tick
+health_prober = HealthProber(probe_targets(BACKEND_PORT))
+
 # Pydantic models
 class SystemMetrics(BaseModel):
     timestamp: float
@@ -36,6 +77,18 @@ class SystemMetrics(BaseModel):
     disk_total_gb: float
     boot_time: float
 
+class ProbeStatus(BaseModel):
+    kind: str
+    port: Optional[int] = None
+    healthy: bool
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+    failure_rate: Optional[float] = None
+    samples: int = 0
+
 class ProcessStatus(BaseModel):
     name: str
     running: bool
@@ -45,6 +98,7 @@ class ProcessStatus(BaseModel):
     memory_percent: Optional[float] = None
     uptime_seconds: Optional[float] = None
     cmdline: Optional[str] = None
+    probe: Optional[ProbeStatus] = None
 
 class ProcessMetrics(BaseModel):
     timestamp: float
@@ -357,12 +411,12 @@ def get_process_metrics() -> ProcessMetrics:
     else:
         processes.append(ProcessStatus(name="Cloudflared", running=False))
     
-    # 6. Monitoring Dashboard Backend - check by port 8081 or path/cmdline
-    dashboard_proc = find_process_by_port(8081)
+    # 6. Monitoring Dashboard Backend - check by BACKEND_PORT or path/cmdline
+    dashboard_proc = find_process_by_port(BACKEND_PORT)
     if dashboard_proc:
         dashboard_info = get_process_info(dashboard_proc, now)
         if dashboard_info:
-            dashboard_info['port'] = 8081
+            dashboard_info['port'] = BACKEND_PORT
             processes.append(ProcessStatus(name="Monitoring Dashboard", running=True, **dashboard_info))
         else:
             processes.append(ProcessStatus(name="Monitoring Dashboard", running=False))
@@ -373,7 +427,7 @@ def get_process_metrics() -> ProcessMetrics:
             exclude_keywords=['grep', 'node', 'vite', 'personal-dashboard', 'knowledge-graph']
         )
         if dashboard_info:
-            dashboard_info['port'] = 8081
+            dashboard_info['port'] = BACKEND_PORT
             processes.append(ProcessStatus(name="Monitoring Dashboard", running=True, **dashboard_info))
         else:
             processes.append(ProcessStatus(name="Monitoring Dashboard", running=False))
@@ -415,33 +469,261 @@ def get_process_metrics() -> ProcessMetrics:
     
     return ProcessMetrics(timestamp=now, processes=processes)
 
-async def metrics_collector():
-    """Background task to collect metrics periodically"""
+def collect_metrics() -> Dict:
+    """Collect one combined system + process sample"""
+    system_metrics = get_system_metrics()
+    process_metrics = get_process_metrics()
+    return {
+        "timestamp": system_metrics.timestamp,
+        "system": system_metrics.model_dump(),
+        "processes": [p.model_dump() for p in process_metrics.processes]
+    }
+
+def compact_sample(combined: Dict) -> Dict:
+    """Copy of a sample without process command lines, the only unbounded fields"""
+    return {**combined, "processes": [{**proc, "cmdline": None} for proc in combined["processes"]]}
+
+def record_metrics(combined: Dict):
+    """Store a sample in the shared ring or the in-process history"""
     global metrics_history
+    if shared_history:
+        try:
+            shared_history.append(combined)
+        except ValueError:
+            # Long command lines can overflow a slot; keep the sample without them
+            try:
+                shared_history.append(compact_sample(combined))
+            except ValueError as e:
+                print(f"Dropping metrics sample: {e}")
+        return
+
+    metrics_history.append(combined)
+
+    # Keep only last 7 days of data
+    cutoff = time.time() - (DATA_RETENTION_HOURS * 3600)
+    metrics_history = [m for m in metrics_history if m["timestamp"] > cutoff]
+
+def first_index_after(history: List[Dict], timestamp: float) -> int:
+    """Index of the first sample newer than timestamp (history is append-ordered)"""
+    lo, hi = 0, len(history)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if history[mid]["timestamp"] <= timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def downsample_step(count: int, max_points: int) -> int:
+    """Systematic sampling step that keeps roughly max_points of count"""
+    return max(1, count // max_points) if count > max_points else 1
+
+def history_points(cutoff: float, max_points: int) -> Tuple[List[bytes], int]:
+    """JSON of the downsampled samples newer than cutoff, oldest first, and how many were in range"""
+    if shared_history:
+        # Locate the range by sequence number and copy only the kept slots;
+        # they already hold compact JSON, so nothing is decoded
+        start, end = shared_history.find_seq(cutoff), shared_history.write_seq
+        total = end - start
+        return shared_history.read_range_payloads(start, end, downsample_step(total, max_points)), total
+
+    # Hold on to the current list; the collector replaces rather than trims it
+    history = metrics_history
+    start = first_index_after(history, cutoff)
+    total = len(history) - start
+    return [
+        json.dumps(sample, separators=(",", ":")).encode()
+        for sample in history[start::downsample_step(total, max_points)]
+    ], total
+
+def iter_history(start: float, end: Optional[float] = None) -> Iterator[Dict]:
+    """Lazily yield samples with start < timestamp <= end, oldest first"""
+    if shared_history:
+        yield from shared_history.iter_range(start, end)
+        return
+
+    history = metrics_history
+    for sample in islice(history, first_index_after(history, start), None):
+        if end is not None and sample["timestamp"] > end:
+            break
+        yield sample
+
+def latest_sample() -> Optional[Dict]:
+    """Most recently collected sample, if the collector has run yet"""
+    if shared_history:
+        return shared_history.latest()
+    history = metrics_history
+    return history[-1] if history else None
+
+def record_top_processes(snapshot: Dict):
+    """Publish this tick's process rankings to the shared ring or in-process cache"""
+    global top_processes
+    top_processes = snapshot
+    if shared_top_processes:
+        try:
+            shared_top_processes.append(snapshot)
+        except ValueError as e:
+            print(f"Dropping process rankings: {e}")
+
+def collect_tick() -> Tuple[Dict, Dict]:
+    """Blocking psutil work for one tick: combined sample + process rankings"""
+    return collect_metrics(), take_top_snapshot(process_sampler)
+
+async def metrics_collector(broadcast: bool = True):
+    """Background task to collect metrics periodically"""
     while True:
         try:
-            system_metrics = get_system_metrics()
-            process_metrics = get_process_metrics()
+            # psutil scans run in a thread so the event loop stays responsive;
+            # probes then target the ports the scan actually found
+            combined, snapshot = await asyncio.to_thread(collect_tick)
+            probe_results = await health_prober.run(
+                {proc["name"]: proc["port"] for proc in combined["processes"]}
+            )
+            for proc in combined["processes"]:
+                proc["probe"] = probe_results.get(proc["name"])
             
-            combined = {
-                "timestamp": system_metrics.timestamp,
-                "system": system_metrics.model_dump(),
-                "processes": [p.model_dump() for p in process_metrics.processes]
-            }
-            
-            metrics_history.append(combined)
-            
-            # Keep only last 7 days of data
-            cutoff = time.time() - (DATA_RETENTION_HOURS * 3600)
-            metrics_history = [m for m in metrics_history if m["timestamp"] > cutoff]
+            record_metrics(combined)
+            record_top_processes(snapshot)
+            if history_notifier:
+                history_notifier.notify()
             
             # Broadcast to all connected WebSocket clients
-            await broadcast_metrics(combined)
+            if broadcast:
+                await broadcast_metrics(combined)
+                await broadcast_top_processes(snapshot)
             
-            await asyncio.sleep(5)  # Collect every 5 seconds
+            await asyncio.sleep(COLLECT_INTERVAL_SECONDS)
         except Exception as e:
             print(f"Error in metrics collector: {e}")
-            await asyncio.sleep(5)
+            await asyncio.sleep(COLLECT_INTERVAL_SECONDS)
+
+async def history_follower():
+    """Worker-side task: broadcast samples the shared collector writes"""
+    global top_processes
+    cursor = shared_history.write_seq
+    top_cursor = 0
+    subscriber = RingSubscriber(shared_history.name)
+    try:
+        while True:
+            try:
+                # Woken right after each collector write
+                await subscriber.wait(SHARED_HISTORY_POLL_SECONDS)
+                samples, cursor = shared_history.read_since(cursor)
+                for combined in samples:
+                    await broadcast_metrics(combined)
+                
+                # Only the newest ranking matters; decode it once per tick per worker
+                if shared_top_processes.write_seq != top_cursor:
+                    top_cursor = shared_top_processes.write_seq
+                    snapshot = shared_top_processes.latest()
+                    if snapshot:
+                        top_processes = snapshot
+                        await broadcast_top_processes(snapshot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in history follower: {e}")
+    finally:
+        subscriber.close()
+
+def run_shared_collector(name: str):
+    """Entry point of the dedicated collector process in multi-worker mode"""
+    global shared_history, shared_top_processes, history_notifier
+    shared_history = SharedHistoryRing.attach(name)
+    shared_top_processes = SharedHistoryRing.attach(f"{name}_top")
+    history_notifier = RingNotifier(name)
+    try:
+        asyncio.run(metrics_collector(broadcast=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shared_history.close()
+        shared_top_processes.close()
+        history_notifier.close()
+
+def shm_available_bytes() -> int:
+    """Free space for POSIX shared memory (tmpfs on Linux, RAM on macOS)"""
+    if os.path.isdir("/dev/shm"):
+        return shutil.disk_usage("/dev/shm").free
+    return psutil.virtual_memory().available
+
+class CollectorSupervisor(threading.Thread):
+    """Restarts the shared collector process if it dies; stops the server if it keeps dying"""
+
+    def __init__(self, start_collector: Callable[[], multiprocessing.Process]):
+        super().__init__(daemon=True)
+        self._start_collector = start_collector
+        self._stop_event = threading.Event()
+        self.collector = start_collector()
+
+    def run(self):
+        crashes = deque()
+        while not self._stop_event.wait(1.0):
+            if self.collector.is_alive():
+                continue
+            print(f"[Collector] Process {self.collector.pid} exited with code {self.collector.exitcode}")
+            now = time.time()
+            crashes.append(now)
+            while crashes[0] < now - COLLECTOR_RESTART_WINDOW_SECONDS:
+                crashes.popleft()
+            if len(crashes) > COLLECTOR_MAX_RESTARTS:
+                # Workers would otherwise keep serving stale history silently
+                print("[Collector] Crashing repeatedly, shutting down")
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            self.collector = self._start_collector()
+            print(f"[Collector] Restarted as PID {self.collector.pid}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+        self.collector.terminate()
+        self.collector.join(timeout=5)
+
+def serve_multi_worker(port: int, workers: int, collector_target: Callable = run_shared_collector,
+                       collector_args: Tuple = (), prepare: Optional[Callable] = None,
+                       host: str = "0.0.0.0", **uvicorn_kwargs):
+    """One supervised collector process, `workers` uvicorn workers reading its ring"""
+    slots = int(DATA_RETENTION_HOURS * 3600 / COLLECT_INTERVAL_SECONDS)
+    required = ring_bytes(slots, SHARED_HISTORY_SLOT_BYTES) + ring_bytes(4, SHARED_TOP_SLOT_BYTES)
+    available = shm_available_bytes()
+    if required > available:
+        # Pages are only backed on first write, so an undersized /dev/shm would
+        # SIGBUS the collector days later instead of failing now
+        raise SystemExit(
+            f"Shared history needs {required / 1024**2:.0f} MiB of shared memory but only "
+            f"{available / 1024**2:.0f} MiB is available. Lower SHARED_HISTORY_SLOT_BYTES "
+            f"or enlarge /dev/shm (e.g. docker run --shm-size)."
+        )
+    
+    ring = SharedHistoryRing.create(None, slots, SHARED_HISTORY_SLOT_BYTES)
+    top_ring = SharedHistoryRing.create(f"{ring.name}_top", 4, SHARED_TOP_SLOT_BYTES)
+    os.makedirs(notify_dir(ring.name), exist_ok=True)
+    supervisor = None
+    try:
+        if prepare:
+            prepare(ring)
+        supervisor = CollectorSupervisor(lambda: _start_process(collector_target, (ring.name,) + collector_args))
+        supervisor.start()
+        os.environ["SHARED_HISTORY_NAME"] = ring.name
+        print(f"Shared collector PID {supervisor.collector.pid}, history ring '{ring.name}' ({slots} slots)")
+        
+        uvicorn.run("main:app", host=host, port=port, workers=workers, **uvicorn_kwargs)
+    finally:
+        if supervisor:
+            supervisor.stop()
+        for shared_ring in (ring, top_ring):
+            shared_ring.close()
+            shared_ring.unlink()
+        shutil.rmtree(notify_dir(ring.name), ignore_errors=True)
+
+def _start_process(target: Callable, args: Tuple) -> multiprocessing.Process:
+    # Never fork: restarts happen from the supervisor thread of a threaded
+    # uvicorn parent, and a forked child could inherit locks held by other
+    # threads. spawn is also what macOS uses by default.
+    process = multiprocessing.get_context("spawn").Process(target=target, args=args, daemon=True)
+    process.start()
+    return process
 
 async def broadcast_metrics(metrics: Dict):
     """Broadcast metrics to all connected WebSocket clients"""
@@ -457,14 +739,48 @@ async def broadcast_metrics(metrics: Dict):
         if conn in active_connections:
             active_connections.remove(conn)
 
+def top_processes_view(snapshot: Dict, by: str, n: int) -> Dict:
+    """Slice a precomputed ranking for one viewer"""
+    return {
+        "timestamp": snapshot["timestamp"],
+        "process_count": snapshot["process_count"],
+        "by": by,
+        "ranked": snapshot["ranked"][by],
+        "processes": snapshot["rankings"][by][:n]
+    }
+
+async def broadcast_top_processes(snapshot: Dict):
+    """Send each process-explorer client its requested ranking"""
+    disconnected = []
+    for connection, (by, n) in list(process_connections.items()):
+        if by not in snapshot["rankings"]:
+            continue
+        try:
+            await connection.send_json(top_processes_view(snapshot, by, n))
+        except Exception:
+            disconnected.append(connection)
+    
+    for conn in disconnected:
+        process_connections.pop(conn, None)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan"""
+    global shared_history, shared_top_processes
     # Startup
-    collector_task = asyncio.create_task(metrics_collector())
+    if SHARED_HISTORY_NAME:
+        # Another process collects; this worker only reads and fans out
+        shared_history = SharedHistoryRing.attach(SHARED_HISTORY_NAME)
+        shared_top_processes = SharedHistoryRing.attach(f"{SHARED_HISTORY_NAME}_top")
+        collector_task = asyncio.create_task(history_follower())
+    else:
+        collector_task = asyncio.create_task(metrics_collector())
     yield
     # Shutdown
     collector_task.cancel()
+    if shared_history:
+        shared_history.close()
+        shared_top_processes.close()
 
 app = FastAPI(
     title="Host Monitoring Dashboard API",
@@ -516,36 +832,33 @@ async def get_auth_config():
         "require_token": False
     }
 
+# Both endpoints serve the collector's latest sample, so requests never scan
+# the host themselves (in any worker). Only before the first tick do they
+# fall back to a scan; plain `def` keeps that blocking psutil work in
+# FastAPI's threadpool instead of on the event loop.
 @app.get("/api/metrics/system")
-async def get_current_system_metrics(auth: dict = Depends(verify_auth)):
+def get_current_system_metrics(auth: dict = Depends(verify_auth)):
     """Get current system metrics"""
+    latest = latest_sample()
+    if latest:
+        return SystemMetrics(**latest["system"])
     return get_system_metrics()
 
 @app.get("/api/metrics/processes")
-async def get_current_process_metrics(auth: dict = Depends(verify_auth)):
-    """Get current process metrics"""
+def get_current_process_metrics(auth: dict = Depends(verify_auth)):
+    """Get current process metrics, with the latest health probe of each service"""
+    latest = latest_sample()
+    if latest:
+        return ProcessMetrics(timestamp=latest["timestamp"], processes=latest["processes"])
     return get_process_metrics()
 
-def downsample_data(data: List[Dict], max_points: int = 500) -> List[Dict]:
-    """Downsample data to max_points for efficient rendering"""
-    if len(data) <= max_points:
-        return data
-    
-    # Use systematic sampling to reduce points
-    step = len(data) // max_points
-    return data[::step]
-
 @app.get("/api/metrics/history")
-async def get_metrics_history(
+def get_metrics_history(
     hours: int = 24,
     auth: dict = Depends(verify_auth)
 ):
     """Get historical metrics for the specified time period with downsampling"""
     cutoff = time.time() - (hours * 3600)
-    filtered_history = [m for m in metrics_history if m["timestamp"] > cutoff]
-    
-    # Sort by timestamp to ensure correct order
-    filtered_history.sort(key=lambda x: x["timestamp"])
     
     # Downsample based on time range
     # Longer periods need more aggressive downsampling
@@ -556,18 +869,73 @@ async def get_metrics_history(
     else:  # 7 days
         max_points = 300
     
-    downsampled = downsample_data(filtered_history, max_points)
+    # Only the kept points are copied; plain `def` keeps this off the event
+    # loop so WebSocket fan-out is not blocked meanwhile
+    downsampled, total_points = history_points(cutoff, max_points)
     
-    return {
-        "hours": hours,
-        "data_points": len(downsampled),
-        "total_points": len(filtered_history),
-        "data": downsampled
-    }
+    # Samples are plain JSON already: splice them into the body here rather
+    # than have FastAPI's jsonable_encoder walk ~10x slower over every field
+    header = json.dumps({"hours": hours, "data_points": len(downsampled), "total_points": total_points})
+    body = header[:-1].encode() + b', "data": [' + b",".join(downsampled) + b"]}"
+    return Response(content=body, media_type="application/json")
 
-@app.websocket("/ws/metrics")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time metrics"""
+@app.get("/api/metrics/export")
+async def export_metrics_history(
+    format: str = "ndjson",
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    auth: dict = Depends(verify_auth)
+):
+    """Stream raw history (system + per-process fields) for a time range, chunk by chunk"""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}', expected one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    if format in ("parquet", "arrow") and not arrow_available():
+        raise HTTPException(status_code=501, detail=f"{format} export requires pyarrow to be installed")
+    
+    if start is None:
+        start = time.time() - (DATA_RETENTION_HOURS * 3600)
+    samples = iter_history(start, end)
+    
+    system_columns = model_columns(SystemMetrics, "system_", exclude=["timestamp"])
+    process_columns = model_columns(ProcessStatus, "process_")
+    if format == "ndjson":
+        body = iter_ndjson(samples)
+    elif format == "csv":
+        body = iter_csv(samples, system_columns, process_columns)
+    else:
+        body = iter_arrow(samples, system_columns, process_columns, fmt=format)
+    
+    filename = f"metrics-{int(start)}-{int(end or time.time())}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/processes/top")
+async def get_top_processes(
+    by: str = "cpu",
+    n: int = 10,
+    auth: dict = Depends(verify_auth)
+):
+    """Top-N processes by cpu, rss, io or fds from the latest collector tick"""
+    if by not in ALL_RANK_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown ranking '{by}', expected one of: {', '.join(ALL_RANK_KEYS)}"
+        )
+    if by not in RANK_KEYS:
+        raise HTTPException(status_code=501, detail=f"Ranking '{by}' is not supported on this platform")
+    if not top_processes or by not in top_processes["rankings"]:
+        # CPU / I/O rates need two collector ticks
+        raise HTTPException(status_code=503, detail=f"Ranking '{by}' is not available yet")
+    return top_processes_view(top_processes, by, max(1, min(n, TOP_PROCESSES_MAX)))
+
+async def authenticate_websocket(websocket: WebSocket) -> bool:
+    """Accept the socket and check Cloudflare Access headers; closes it on failure"""
     await websocket.accept()
     
     # 获取 WebSocket 连接信息
@@ -584,56 +952,84 @@ async def websocket_endpoint(websocket: WebSocket):
     if cf_email:
         print(f"[WS Auth] Cloudflare Access 认证成功: {cf_email}")
         # 认证通过，继续处理
-    else:
-        print(f"[WS Auth] 认证失败 - 未找到 Cloudflare Headers")
-        await websocket.close(code=4001, reason="Authentication required")
+        return True
+    
+    print(f"[WS Auth] 认证失败 - 未找到 Cloudflare Headers")
+    await websocket.close(code=4001, reason="Authentication required")
+    return False
+
+async def websocket_keepalive(websocket: WebSocket):
+    """Keep connection alive and handle client messages until it closes"""
+    while True:
+        try:
+            # Use timeout to allow periodic checks
+            data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+            # Handle ping/pong from client
+            if data == "ping":
+                await websocket.send_text("pong")
+            elif data == "pong":
+                # Client responded to our ping, connection is alive
+                pass
+        except asyncio.TimeoutError:
+            # Send ping to keep connection alive
+            try:
+                await websocket.send_text("ping")
+            except Exception:
+                break
+        except WebSocketDisconnect:
+            break
+        except Exception:
+            break
+
+@app.websocket("/ws/metrics")
+async def websocket_endpoint(websocket: WebSocket):
+    """WebSocket endpoint for real-time metrics"""
+    if not await authenticate_websocket(websocket):
         return
     
     active_connections.append(websocket)
     
     try:
-        # Send current metrics immediately
-        system_metrics = get_system_metrics()
-        process_metrics = get_process_metrics()
-        await websocket.send_json({
-            "timestamp": system_metrics.timestamp,
-            "system": system_metrics.model_dump(),
-            "processes": [p.model_dump() for p in process_metrics.processes]
-        })
+        # Send current metrics immediately: reuse the collector's latest
+        # sample; only scan (off the event loop) before the first tick
+        current = latest_sample() or await asyncio.to_thread(collect_metrics)
+        await websocket.send_json(current)
         
-        # Keep connection alive and handle client messages
-        while True:
-            try:
-                # Use timeout to allow periodic checks
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                # Handle ping/pong from client
-                if data == "ping":
-                    await websocket.send_text("pong")
-                elif data == "pong":
-                    # Client responded to our ping, connection is alive
-                    pass
-            except asyncio.TimeoutError:
-                # Send ping to keep connection alive
-                try:
-                    await websocket.send_text("ping")
-                except Exception:
-                    break
-            except WebSocketDisconnect:
-                break
-            except Exception:
-                break
+        await websocket_keepalive(websocket)
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
         if websocket in active_connections:
             active_connections.remove(websocket)
 
+@app.websocket("/ws/processes")
+async def process_explorer_websocket(websocket: WebSocket, by: str = "cpu", n: int = 10):
+    """WebSocket endpoint streaming the top-N processes each collector tick"""
+    if not await authenticate_websocket(websocket):
+        return
+    if by not in ALL_RANK_KEYS:
+        await websocket.close(code=4002, reason=f"Unknown ranking '{by}'")
+        return
+    if by not in RANK_KEYS:
+        await websocket.close(code=4003, reason=f"Ranking '{by}' is not supported on this platform")
+        return
+    
+    process_connections[websocket] = (by, max(1, min(n, TOP_PROCESSES_MAX)))
+    
+    try:
+        if top_processes and by in top_processes["rankings"]:
+            await websocket.send_json(top_processes_view(top_processes, *process_connections[websocket]))
+        
+        await websocket_keepalive(websocket)
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        process_connections.pop(websocket, None)
+
 if __name__ == "__main__":
-    import uvicorn
-    import signal
     import sys
     
-    port = int(os.getenv("BACKEND_PORT", 18081))
+    port = BACKEND_PORT
     
     def signal_handler(sig, frame):
         print('\nShutting down gracefully...')
@@ -644,4 +1040,7 @@ if __name__ == "__main__":
     
     print(f"Starting server on port {port}")
     
-    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
+    if BACKEND_WORKERS <= 1:
+        uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
+    else:
+        serve_multi_worker(port, BACKEND_WORKERS, log_level="info")
@@ -0,0 +1,122 @@
+"""
+Top-N process explorer.
+
+The collector takes one full process-table snapshot per tick. CPU and I/O
+rates are computed from the delta against the previous tick (no per-process
+sleeps), and each ranking is a heap selection over the snapshot rather than
+a full sort. Rankings are computed once per tick and shared by every viewer.
+"""
+
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+# Ranking name -> row field, for every ranking the explorer knows about
+ALL_RANK_KEYS = {
+    "cpu": "cpu_percent",
+    "rss": "rss_bytes",
+    "io": "io_bytes_per_sec",
+    "fds": "num_fds",
+}
+
+# io_counters / num_fds do not exist on every platform (e.g. macOS has no io_counters)
+_RANK_ATTRS = {"io": "io_counters", "fds": "num_fds"}
+
+# Rankings this platform can produce
+RANK_KEYS = {
+    rank: field for rank, field in ALL_RANK_KEYS.items()
+    if rank not in _RANK_ATTRS or hasattr(psutil.Process, _RANK_ATTRS[rank])
+}
+
+# Rankings derived from the delta against the previous tick
+RATE_KEYS = {"cpu", "io"}
+
+# Rows kept per ranking; also the largest `n` clients may ask for
+TOP_PROCESSES_MAX = 50
+
+SNAPSHOT_ATTRS = ['pid', 'name', 'username', 'create_time', 'cpu_times', 'memory_info'] + [
+    _RANK_ATTRS[rank] for rank in ('io', 'fds') if rank in RANK_KEYS
+]
+
+
+class ProcessSampler:
+    """Snapshots the process table and derives rates from the previous snapshot"""
+
+    def __init__(self):
+        # (pid, create_time) -> (cpu seconds, io bytes)
+        self._previous: Dict[Tuple[int, float], Tuple[Optional[float], Optional[int]]] = {}
+        self._previous_time: Optional[float] = None
+        # False until a sample had a previous tick to compute rates against
+        self.rates_ready = False
+
+    def sample(self) -> List[Dict]:
+        now = time.monotonic()
+        elapsed = now - self._previous_time if self._previous_time else None
+        current = {}
+        rows = []
+
+        for proc in psutil.process_iter(SNAPSHOT_ATTRS, ad_value=None):
+            info = proc.info
+            cpu_times = info['cpu_times']
+            memory_info = info['memory_info']
+            io = info.get('io_counters')
+
+            cpu_total = cpu_times.user + cpu_times.system if cpu_times else None
+            io_total = io.read_bytes + io.write_bytes if io else None
+
+            # create_time disambiguates recycled PIDs
+            key = (info['pid'], info['create_time'])
+            current[key] = (cpu_total, io_total)
+            prev_cpu, prev_io = self._previous.get(key, (None, None))
+
+            cpu_percent = None
+            io_rate = None
+            if elapsed:
+                if cpu_total is not None and prev_cpu is not None:
+                    cpu_percent = round(max(cpu_total - prev_cpu, 0.0) / elapsed * 100, 2)
+                if io_total is not None and prev_io is not None:
+                    io_rate = round(max(io_total - prev_io, 0) / elapsed, 2)
+
+            rows.append({
+                'pid': info['pid'],
+                'name': info['name'],
+                'username': info['username'],
+                'cpu_percent': cpu_percent,
+                'rss_bytes': memory_info.rss if memory_info else None,
+                'io_bytes_per_sec': io_rate,
+                'num_fds': info.get('num_fds'),
+            })
+
+        self._previous = current
+        self._previous_time = now
+        self.rates_ready = elapsed is not None
+        return rows
+
+
+def rank_processes(rows: List[Dict], ranks: List[str],
+                   limit: int = TOP_PROCESSES_MAX) -> Tuple[Dict[str, List[Dict]], Dict[str, int]]:
+    """Top `limit` rows per ranking, plus how many processes had a value for each"""
+    rankings = {}
+    ranked = {}
+    for rank in ranks:
+        field = RANK_KEYS[rank]
+        candidates = [row for row in rows if row[field] is not None]
+        ranked[rank] = len(candidates)
+        rankings[rank] = heapq.nlargest(limit, candidates, key=lambda row: row[field])
+    return rankings, ranked
+
+
+def take_top_snapshot(sampler: ProcessSampler) -> Dict:
+    """One per-tick snapshot shared by the HTTP endpoint and WebSocket viewers"""
+    rows = sampler.sample()
+    # Rate rankings are published from the second tick on
+    ranks = [rank for rank in RANK_KEYS if sampler.rates_ready or rank not in RATE_KEYS]
+    rankings, ranked = rank_processes(rows, ranks)
+    return {
+        "timestamp": time.time(),
+        "process_count": len(rows),
+        "rankings": rankings,
+        "ranked": ranked,
+    }
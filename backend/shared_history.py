@@ -0,0 +1,252 @@
+"""
+Shared-memory ring buffer for metrics history.
+
+One collector process appends samples, any number of API worker processes
+attach by name and read them in place. Each slot holds one JSON-encoded
+sample plus its sequence number and timestamp, so readers can binary-search
+a time range without decoding payloads.
+
+Readers are woken after each write through Unix datagram sockets: every
+worker binds one socket in the ring's notify directory and the writer sends
+a one-byte datagram to each of them.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import struct
+import tempfile
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"HMDRING1"
+
+# magic, slot count, slot size, samples written so far
+HEADER = struct.Struct("<8sIIQ")
+HEADER_BYTES = 64
+
+# sequence number (0 = empty / being written), timestamp, payload length
+SLOT_HEADER = struct.Struct("<QdI4x")
+
+
+def ring_bytes(slots: int, slot_bytes: int) -> int:
+    """Shared memory needed by a ring"""
+    return HEADER_BYTES + slots * slot_bytes
+
+
+class SharedHistoryRing:
+    """Fixed-size ring of metrics samples backed by POSIX shared memory"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        magic, slots, slot_bytes, _ = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory '{shm.name}' is not a metrics history ring")
+        self._shm = shm
+        self._owner = owner
+        self.name = shm.name
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+
+    @classmethod
+    def create(cls, name: Optional[str], slots: int, slot_bytes: int = 4096) -> "SharedHistoryRing":
+        """Create a new ring; the creator is responsible for unlink()"""
+        if slot_bytes <= SLOT_HEADER.size:
+            raise ValueError("slot_bytes is too small to hold a sample")
+        shm = shared_memory.SharedMemory(name=name, create=True, size=ring_bytes(slots, slot_bytes))
+        HEADER.pack_into(shm.buf, 0, MAGIC, slots, slot_bytes, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedHistoryRing":
+        """Attach to a ring created by another process"""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def write_seq(self) -> int:
+        """Number of samples written since the ring was created"""
+        return HEADER.unpack_from(self._shm.buf, 0)[3]
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest sample still held by the ring"""
+        return max(0, self.write_seq - self.slots)
+
+    def _offset(self, seq: int) -> int:
+        return HEADER_BYTES + (seq % self.slots) * self.slot_bytes
+
+    def append(self, sample: Dict) -> int:
+        """Write a sample into the next slot (single writer only)"""
+        # UTF-8 rather than \uXXXX escapes: non-ASCII text takes half the room or less
+        payload = json.dumps(sample, separators=(",", ":"), ensure_ascii=False).encode()
+        if len(payload) > self.slot_bytes - SLOT_HEADER.size:
+            raise ValueError(
+                f"Sample of {len(payload)} bytes does not fit in a {self.slot_bytes}-byte slot"
+            )
+
+        buf = self._shm.buf
+        seq = self.write_seq
+        offset = self._offset(seq)
+
+        # Mark the slot as in-progress so readers skip it while it is rewritten
+        SLOT_HEADER.pack_into(buf, offset, 0, 0.0, 0)
+        start = offset + SLOT_HEADER.size
+        buf[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(buf, offset, seq + 1, float(sample["timestamp"]), len(payload))
+
+        HEADER.pack_into(buf, 0, MAGIC, self.slots, self.slot_bytes, seq + 1)
+        return seq
+
+    def _timestamp(self, seq: int) -> Optional[float]:
+        stored_seq, timestamp, _ = SLOT_HEADER.unpack_from(self._shm.buf, self._offset(seq))
+        return timestamp if stored_seq == seq + 1 else None
+
+    def read(self, seq: int) -> Optional[Dict]:
+        """Read one sample, or None if it has been overwritten"""
+        payload = self.read_payload(seq)
+        return json.loads(payload) if payload is not None else None
+
+    def read_payload(self, seq: int) -> Optional[bytes]:
+        """Raw JSON of one sample, or None if it has been overwritten"""
+        buf = self._shm.buf
+        offset = self._offset(seq)
+        stored_seq, _, length = SLOT_HEADER.unpack_from(buf, offset)
+        if stored_seq != seq + 1:
+            return None
+
+        start = offset + SLOT_HEADER.size
+        payload = bytes(buf[start:start + length])
+
+        # The writer may have lapped us while we were copying
+        if SLOT_HEADER.unpack_from(buf, offset)[0] != stored_seq:
+            return None
+        return payload
+
+    def read_since(self, cursor: int) -> Tuple[List[Dict], int]:
+        """Return samples written after `cursor` and the new cursor"""
+        end = self.write_seq
+        samples = []
+        for seq in range(max(cursor, end - self.slots), end):
+            sample = self.read(seq)
+            if sample is not None:
+                samples.append(sample)
+        return samples, end
+
+    def read_range(self, start: int, end: int, step: int = 1) -> List[Dict]:
+        """Decode every `step`-th sample in [start, end), skipping overwritten ones"""
+        return [json.loads(payload) for payload in self.read_range_payloads(start, end, step)]
+
+    def read_range_payloads(self, start: int, end: int, step: int = 1) -> List[bytes]:
+        """Raw JSON of every `step`-th sample in [start, end), skipping overwritten ones"""
+        payloads = []
+        for seq in range(max(start, self.oldest_seq), end, step):
+            payload = self.read_payload(seq)
+            if payload is not None:
+                payloads.append(payload)
+        return payloads
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent sample, if any"""
+        end = self.write_seq
+        return self.read(end - 1) if end else None
+
+    def find_seq(self, timestamp: float) -> int:
+        """First sequence number whose sample is newer than `timestamp`"""
+        lo, hi = self.oldest_seq, self.write_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            ts = self._timestamp(mid)
+            # Slots overwritten mid-search are older than anything left
+            if ts is None or ts <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iter_range(self, start: float, end: Optional[float] = None) -> Iterator[Dict]:
+        """Yield samples with start < timestamp <= end, oldest first"""
+        seq = self.find_seq(start)
+        while seq < self.write_seq:
+            sample = self.read(seq)
+            seq += 1
+            if sample is None:
+                continue
+            if end is not None and sample["timestamp"] > end:
+                break
+            yield sample
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        if self._owner:
+            self._shm.unlink()
+
+
+def notify_dir(name: str) -> str:
+    """Directory holding the wake-up sockets of a ring's readers"""
+    return os.path.join(tempfile.gettempdir(), f"{name}-notify")
+
+
+class RingNotifier:
+    """Writer side: wakes every subscribed reader after a write"""
+
+    def __init__(self, name: str):
+        self.directory = notify_dir(name)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def notify(self):
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                self._sock.sendto(b"1", entry.path)
+            except BlockingIOError:
+                # Reader already has wake-ups queued
+                pass
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Reader exited without cleaning up
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        self._sock.close()
+
+
+class RingSubscriber:
+    """Reader side: a socket the writer pings after every write"""
+
+    def __init__(self, name: str):
+        self.path = os.path.join(notify_dir(name), f"reader-{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._sock.bind(self.path)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a write notification; False if `timeout` passed first"""
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.sock_recv(self._sock, 16), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        # Collapse wake-ups that queued while we were busy
+        while True:
+            try:
+                self._sock.recv(16)
+            except BlockingIOError:
+                return True
+
+    def close(self):
+        self._sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,168 @@
+import asyncio
+import socket
+
+from health_probes import HealthProber, ProbeTarget, percentile, probe_port, resolve_probe_ports
+
+HOST = "127.0.0.1"
+
+
+async def http_server(status_line):
+    """Stub service answering every request with `status_line`"""
+    async def handle(reader, writer):
+        await reader.readline()
+        writer.write(status_line + b"\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, HOST, 0)
+
+
+async def hung_server():
+    """Stub service that accepts connections but never answers"""
+    async def handle(reader, writer):
+        await asyncio.sleep(3600)
+
+    return await asyncio.start_server(handle, HOST, 0)
+
+
+def server_port(server):
+    return server.sockets[0].getsockname()[1]
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def with_server(factory, check):
+    async def scenario():
+        server = await factory()
+        try:
+            return await check(server_port(server))
+        finally:
+            server.close()
+
+    return asyncio.run(scenario())
+
+
+def test_healthy_http():
+    healthy, latency_ms, error = with_server(
+        lambda: http_server(b"HTTP/1.1 200 OK"), lambda port: probe_port(HOST, port, "http", "/api/health")
+    )
+    assert healthy is True
+    assert error is None
+    assert latency_ms >= 0
+
+
+def test_client_error_counts_as_up():
+    healthy, _, error = with_server(
+        lambda: http_server(b"HTTP/1.1 404 Not Found"), lambda port: probe_port(HOST, port, "http")
+    )
+    assert healthy is True
+    assert error is None
+
+
+def test_server_error():
+    healthy, _, error = with_server(
+        lambda: http_server(b"HTTP/1.1 503 Service Unavailable"), lambda port: probe_port(HOST, port, "http")
+    )
+    assert healthy is False
+    assert error == "HTTP 503"
+
+
+def test_hung_server_times_out():
+    healthy, latency_ms, error = with_server(
+        hung_server, lambda port: probe_port(HOST, port, "http", timeout=0.2)
+    )
+    assert healthy is False
+    assert error == "timeout"
+    assert latency_ms >= 200
+
+
+def test_tcp_probe_only_needs_accept():
+    healthy, _, error = with_server(hung_server, lambda port: probe_port(HOST, port, "tcp", timeout=0.5))
+    assert healthy is True
+    assert error is None
+
+
+def test_refused_port():
+    healthy, _, error = asyncio.run(probe_port(HOST, closed_port(), "tcp"))
+    assert healthy is False
+    assert error == "ConnectionRefusedError"
+
+
+def testpercentile():
+    values = [float(v) for v in range(1, 11)]
+    assert percentile([], 50) is None
+    assert percentile([7.0], 99) == 7.0
+    assert percentile(values, 50) == 5.0
+    assert percentile(values, 95) == 10.0
+    assert percentile(values, 0) == 1.0
+    # Nearest rank: the 90th percentile of 10 values is the 9th, not the 10th
+    assert percentile(values, 90) == 9.0
+    assert percentile([1.234, 5.678], 99) == 5.68
+
+
+def test_failures_enter_window_at_timeout():
+    target = ProbeTarget("Service", 1, "http")
+    prober = HealthProber([target], host=HOST, timeout=0.5)
+    refused = closed_port()
+
+    async def scenario():
+        server = await http_server(b"HTTP/1.1 200 OK")
+        try:
+            for _ in range(3):
+                await prober.run({"Service": server_port(server)})
+            return await prober.run({"Service": refused})
+        finally:
+            server.close()
+
+    result = asyncio.run(scenario())["Service"]
+    assert result["port"] == refused
+    assert result["healthy"] is False
+    assert result["latency_ms"] is None
+    assert result["error"] == "ConnectionRefusedError"
+    assert result["samples"] == 4
+    assert result["failure_rate"] == 0.25
+    # The refused probe counts as a full timeout, not as its fast refusal
+    assert result["p99_ms"] == 500.0
+    assert result["p50_ms"] < 500.0
+
+
+TARGETS = [
+    ProbeTarget("Ollama", 11434, "http"),
+    ProbeTarget("Knowledge Graph API", 8000, "http"),
+    ProbeTarget("Personal Dashboard", 8000, "http"),
+]
+
+
+def test_found_ports_are_probed():
+    found = {"Ollama": 11500, "Knowledge Graph API": 8001, "Personal Dashboard": 8000}
+    assert resolve_probe_ports(TARGETS, found) == found
+
+
+def test_unique_default_port_is_used_when_not_found():
+    assert resolve_probe_ports(TARGETS, {"Ollama": None}) == {"Ollama": 11434}
+
+
+def test_shared_default_port_is_not_probed():
+    # Only one of the two 8000 services is running: the other must not get its health
+    found = {"Ollama": None, "Knowledge Graph API": None, "Personal Dashboard": 8000}
+    assert resolve_probe_ports(TARGETS, found) == {"Ollama": 11434, "Personal Dashboard": 8000}
+
+    found = {"Ollama": None, "Knowledge Graph API": 8001, "Personal Dashboard": None}
+    assert resolve_probe_ports(TARGETS, found) == {"Ollama": 11434, "Knowledge Graph API": 8001}
+
+
+def test_default_port_claimed_by_another_service_is_not_probed():
+    targets = [ProbeTarget("Ollama", 11434, "http"), ProbeTarget("Other", 9000, "http")]
+    assert resolve_probe_ports(targets, {"Ollama": 9000, "Other": None}) == {"Ollama": 9000}
+
+
+def test_unattributable_target_has_no_probe_result():
+    port = closed_port()
+    targets = [ProbeTarget("Knowledge Graph API", port, "tcp"), ProbeTarget("Personal Dashboard", port, "tcp")]
+    prober = HealthProber(targets, host=HOST, timeout=0.5)
+    results = asyncio.run(prober.run({"Knowledge Graph API": None, "Personal Dashboard": port}))
+    assert set(results) == {"Personal Dashboard"}
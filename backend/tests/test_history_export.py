@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import uuid
+from typing import Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+import main
+from history_export import iter_arrow, iter_csv, iter_ndjson, model_columns
+from shared_history import SharedHistoryRing
+
+SYSTEM_COLUMNS = model_columns(main.SystemMetrics, "system_", exclude=["timestamp"])
+PROCESS_COLUMNS = model_columns(main.ProcessStatus, "process_")
+
+
+def make_sample(timestamp: float) -> Dict:
+    system = main.SystemMetrics(
+        timestamp=timestamp, cpu_percent=12.5, memory_percent=40.0, memory_used_gb=6.4,
+        memory_total_gb=16.0, disk_percent=55.0, disk_used_gb=110.0, disk_total_gb=200.0, boot_time=1.0,
+    )
+    probe = main.ProbeStatus(kind="http", port=11434, healthy=True, latency_ms=1.5, p95_ms=3.0, samples=4)
+    processes = [
+        main.ProcessStatus(name="Ollama", running=True, pid=42, port=11434, probe=probe),
+        main.ProcessStatus(name="OpenClaw Node", running=False),
+    ]
+    return {
+        "timestamp": timestamp,
+        "system": system.model_dump(),
+        "processes": [p.model_dump() for p in processes],
+    }
+
+
+def test_model_columns_flatten_nested_probe():
+    columns = {name: (path, kind) for name, path, kind in PROCESS_COLUMNS}
+    assert "process_probe" not in columns
+    assert columns["process_probe_p95_ms"] == (("probe", "p95_ms"), float)
+    assert columns["process_probe_healthy"] == (("probe", "healthy"), bool)
+    assert columns["process_probe_kind"] == (("probe", "kind"), str)
+    assert columns["process_name"] == (("name",), str)
+    assert columns["process_pid"] == (("pid",), int)
+
+
+def test_model_columns_exclude_and_containers():
+    class Model(BaseModel):
+        timestamp: float
+        tags: List[str]
+        extra: Optional[Dict[str, int]] = None
+
+    columns = model_columns(Model, "m_", exclude=["timestamp"])
+    assert columns == [("m_tags", ("tags",), dict), ("m_extra", ("extra",), dict)]
+    assert "system_timestamp" not in [name for name, _, _ in SYSTEM_COLUMNS]
+
+
+def read_csv(chunks):
+    return list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+
+
+def test_csv_empty_range_is_header_only():
+    chunks = list(iter_csv(iter([]), SYSTEM_COLUMNS, PROCESS_COLUMNS))
+    assert len(chunks) == 1
+    header = chunks[0].decode().strip().split(",")
+    assert header[0] == "timestamp"
+    assert "process_probe_p95_ms" in header
+
+
+def test_csv_one_row_per_process_per_sample():
+    samples = [make_sample(100.0 + i) for i in range(3)]
+    rows = read_csv(iter_csv(iter(samples), SYSTEM_COLUMNS, PROCESS_COLUMNS, chunk_samples=2))
+    assert len(rows) == 6
+    assert [row["timestamp"] for row in rows] == ["100.0", "100.0", "101.0", "101.0", "102.0", "102.0"]
+    assert rows[0]["system_cpu_percent"] == "12.5"
+    assert rows[0]["process_probe_p95_ms"] == "3.0"
+    # Missing nested model -> empty cells, not an error
+    assert rows[1]["process_name"] == "OpenClaw Node"
+    assert rows[1]["process_probe_p95_ms"] == ""
+
+
+def test_csv_sample_without_processes_keeps_a_row():
+    sample = make_sample(100.0)
+    sample["processes"] = []
+    rows = read_csv(iter_csv(iter([sample]), SYSTEM_COLUMNS, PROCESS_COLUMNS))
+    assert len(rows) == 1
+    assert rows[0]["process_name"] == ""
+
+
+def test_ndjson_round_trip():
+    samples = [make_sample(100.0 + i) for i in range(3)]
+    lines = b"".join(iter_ndjson(iter(samples), chunk_samples=2)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == samples
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_round_trip(fmt):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    samples = [make_sample(100.0 + i) for i in range(3)]
+    data = b"".join(iter_arrow(iter(samples), SYSTEM_COLUMNS, PROCESS_COLUMNS, fmt=fmt, chunk_samples=2))
+    if fmt == "parquet":
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+
+    assert table.num_rows == 6
+    assert table.column("timestamp").to_pylist() == [100.0, 100.0, 101.0, 101.0, 102.0, 102.0]
+    assert table.column("process_name").to_pylist()[:2] == ["Ollama", "OpenClaw Node"]
+    assert table.column("process_probe_p95_ms").to_pylist()[:2] == [3.0, None]
+    assert table.schema.field("process_probe_healthy").type == pa.bool_()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_empty_range(fmt):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    data = b"".join(iter_arrow(iter([]), SYSTEM_COLUMNS, PROCESS_COLUMNS, fmt=fmt))
+    if fmt == "parquet":
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 0
+    assert "process_probe_p95_ms" in table.column_names
+
+
+@pytest.fixture(params=["list", "shared"])
+def history(request, monkeypatch):
+    samples = [{"timestamp": float(t)} for t in range(1, 11)]
+    if request.param == "list":
+        monkeypatch.setattr(main, "shared_history", None)
+        monkeypatch.setattr(main, "metrics_history", samples)
+        yield
+        return
+
+    ring = SharedHistoryRing.create(f"hmd-test-{uuid.uuid4().hex[:8]}", slots=16, slot_bytes=128)
+    for sample in samples:
+        ring.append(sample)
+    monkeypatch.setattr(main, "shared_history", ring)
+    yield
+    ring.close()
+    ring.unlink()
+
+
+def timestamps(samples):
+    return [sample["timestamp"] for sample in samples]
+
+
+def test_iter_history_bounds(history):
+    # start is exclusive, end inclusive
+    assert timestamps(main.iter_history(3.0, 7.0)) == [4.0, 5.0, 6.0, 7.0]
+    assert timestamps(main.iter_history(3.0)) == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    assert timestamps(main.iter_history(3.5, 3.9)) == []
+    assert timestamps(main.iter_history(10.0)) == []
+    assert timestamps(main.iter_history(0.0, 2.0)) == [1.0, 2.0]
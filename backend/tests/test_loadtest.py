@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import pytest
+
+from loadtest import history_poller, http_get
+
+HOST = "127.0.0.1"
+
+
+def serve(reply, scenario):
+    """Run `scenario(port)` against a stub server sending `reply` (None = never answer)"""
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        if reply is None:
+            await asyncio.sleep(3600)
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, HOST, 0)
+        try:
+            return await scenario(server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_http_get_status():
+    reply = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}"
+    assert serve(reply, lambda port: http_get(HOST, port, "/", {})) == (200, len(reply))
+
+
+@pytest.mark.parametrize("reply", [b"", b"garbage", b"HTTP/1.1"])
+def test_http_get_rejects_malformed_reply(reply):
+    with pytest.raises(ValueError):
+        serve(reply, lambda port: http_get(HOST, port, "/", {}))
+
+
+def test_http_get_times_out():
+    with pytest.raises(asyncio.TimeoutError):
+        serve(None, lambda port: http_get(HOST, port, "/", {}, timeout=0.2))
+
+
+def test_bad_polls_are_counted_not_raised():
+    stats = {"poll_latencies_ms": [], "poll_errors": 0}
+
+    async def poll(port):
+        now = time.time()
+        await history_poller(HOST, port, "/", 0.1, (now, now + 0.5), stats)
+
+    serve(b"", poll)
+    assert stats["poll_errors"] >= 2
+    assert stats["poll_latencies_ms"] == []
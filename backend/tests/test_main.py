@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+
+import main
+from shared_history import SharedHistoryRing
+
+
+@pytest.fixture
+def shared_ring(monkeypatch):
+    ring = SharedHistoryRing.create(f"hmd-test-{uuid.uuid4().hex[:8]}", slots=8, slot_bytes=1536)
+    monkeypatch.setattr(main, "shared_history", ring)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def make_sample(timestamp, cmdline="python main.py"):
+    processes = [
+        main.ProcessStatus(name=f"Service {i}", running=True, pid=100 + i, cmdline=cmdline).model_dump()
+        for i in range(3)
+    ]
+    return {"timestamp": timestamp, "system": {}, "processes": processes}
+
+
+def test_record_metrics_keeps_fitting_sample_intact(shared_ring):
+    # ~1.3 KB as UTF-8; would be ~2 KB with \uXXXX escapes
+    sample = make_sample(1.0, cmdline="知识图谱 " * 20)
+    main.record_metrics(sample)
+    assert shared_ring.latest() == sample
+
+
+def test_record_metrics_drops_cmdlines_from_oversized_sample(shared_ring):
+    sample = make_sample(1.0, cmdline="x" * 400)
+    main.record_metrics(sample)
+    stored = shared_ring.latest()
+    assert stored["timestamp"] == 1.0
+    assert [p["pid"] for p in stored["processes"]] == [100, 101, 102]
+    assert all(p["cmdline"] is None for p in stored["processes"])
+    # The collector's own copy is left untouched for broadcasting
+    assert sample["processes"][0]["cmdline"] == "x" * 400
+
+
+def test_record_metrics_skips_sample_that_cannot_fit(shared_ring, capsys):
+    sample = make_sample(1.0)
+    sample["system"] = {"blob": "x" * 2000}
+    main.record_metrics(sample)
+    assert shared_ring.write_seq == 0
+    assert "Dropping metrics sample" in capsys.readouterr().out
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    def no_scan():
+        raise AssertionError("request scanned the host")
+
+    monkeypatch.setattr(main, "get_system_metrics", no_scan)
+    monkeypatch.setattr(main, "get_process_metrics", no_scan)
+    monkeypatch.setitem(main.app.dependency_overrides, main.verify_auth, lambda: {})
+    # No `with` block: the lifespan (and its collector) does not start
+    return TestClient(main.app)
+
+
+def test_current_metrics_served_from_latest_sample(shared_ring, client):
+    sample = make_sample(5.0)
+    sample["system"] = main.SystemMetrics(
+        timestamp=5.0, cpu_percent=12.5, memory_percent=40.0, memory_used_gb=6.4,
+        memory_total_gb=16.0, disk_percent=55.0, disk_used_gb=110.0, disk_total_gb=200.0, boot_time=1.0,
+    ).model_dump()
+    sample["processes"][0]["probe"] = {"kind": "http", "port": 8000, "healthy": True, "samples": 1}
+    main.record_metrics(sample)
+
+    assert client.get("/api/metrics/system").json() == sample["system"]
+
+    processes = client.get("/api/metrics/processes").json()
+    assert processes["timestamp"] == 5.0
+    assert [p["pid"] for p in processes["processes"]] == [100, 101, 102]
+    assert processes["processes"][0]["probe"]["port"] == 8000
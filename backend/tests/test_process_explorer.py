@@ -0,0 +1,126 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import process_explorer
+from process_explorer import RANK_KEYS, ProcessSampler, rank_processes, take_top_snapshot
+
+
+def row(pid, cpu=None, rss=None):
+    return {
+        "pid": pid, "name": f"proc{pid}", "username": "user",
+        "cpu_percent": cpu, "rss_bytes": rss, "io_bytes_per_sec": None, "num_fds": None,
+    }
+
+
+def test_rank_processes_skips_missing_values():
+    rows = [row(1, cpu=5.0, rss=100), row(2, cpu=None, rss=300), row(3, cpu=20.0, rss=None)]
+    rankings, ranked = rank_processes(rows, ["cpu", "rss"])
+    assert [r["pid"] for r in rankings["cpu"]] == [3, 1]
+    assert [r["pid"] for r in rankings["rss"]] == [2, 1]
+    assert ranked == {"cpu": 2, "rss": 2}
+
+
+def test_rank_processes_limit():
+    rows = [row(pid, rss=pid * 10) for pid in range(1, 21)]
+    rankings, ranked = rank_processes(rows, ["rss"], limit=5)
+    assert [r["pid"] for r in rankings["rss"]] == [20, 19, 18, 17, 16]
+    assert ranked == {"rss": 20}
+
+
+def test_rank_processes_only_requested_ranks():
+    rankings, ranked = rank_processes([row(1, cpu=1.0, rss=1)], ["rss"])
+    assert set(rankings) == set(ranked) == {"rss"}
+
+
+def fake_proc(pid, create_time, cpu_seconds, io_bytes, rss=1024):
+    info = {
+        "pid": pid,
+        "name": f"proc{pid}",
+        "username": "user",
+        "create_time": create_time,
+        "cpu_times": SimpleNamespace(user=cpu_seconds, system=0.0),
+        "memory_info": SimpleNamespace(rss=rss),
+        "io_counters": SimpleNamespace(read_bytes=io_bytes, write_bytes=0),
+        "num_fds": 8,
+    }
+    return SimpleNamespace(info=info)
+
+
+class FakeHost:
+    """Stands in for psutil.process_iter and the monotonic clock"""
+
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        self.procs = []
+        monkeypatch.setattr(process_explorer.psutil, "process_iter", lambda attrs, ad_value=None: list(self.procs))
+        monkeypatch.setattr(process_explorer, "time", SimpleNamespace(monotonic=lambda: self.now, time=time.time))
+
+
+@pytest.fixture
+def host(monkeypatch):
+    return FakeHost(monkeypatch)
+
+
+def by_pid(rows):
+    return {r["pid"]: r for r in rows}
+
+
+def test_first_tick_has_no_rates(host):
+    host.procs = [fake_proc(1, 10.0, cpu_seconds=5.0, io_bytes=1000)]
+    sampler = ProcessSampler()
+    rows = sampler.sample()
+    assert sampler.rates_ready is False
+    assert rows[0]["cpu_percent"] is None
+    assert rows[0]["io_bytes_per_sec"] is None
+    assert rows[0]["rss_bytes"] == 1024
+
+
+def test_second_tick_rates(host):
+    sampler = ProcessSampler()
+    host.procs = [fake_proc(1, 10.0, cpu_seconds=5.0, io_bytes=1000)]
+    sampler.sample()
+
+    host.now += 2.0
+    host.procs = [fake_proc(1, 10.0, cpu_seconds=6.0, io_bytes=5000)]
+    rows = sampler.sample()
+    assert sampler.rates_ready is True
+    assert rows[0]["cpu_percent"] == 50.0
+    if "io" in RANK_KEYS:
+        assert rows[0]["io_bytes_per_sec"] == 2000.0
+
+
+def test_recycled_pid_does_not_reuse_counters(host):
+    sampler = ProcessSampler()
+    host.procs = [fake_proc(1, 10.0, cpu_seconds=5.0, io_bytes=1000), fake_proc(2, 10.0, 1.0, 0)]
+    sampler.sample()
+
+    # PID 1 exited and was reused by a new process with smaller counters
+    host.now += 1.0
+    host.procs = [fake_proc(1, 20.0, cpu_seconds=0.5, io_bytes=10), fake_proc(2, 10.0, 1.5, 0)]
+    rows = by_pid(sampler.sample())
+    assert rows[1]["cpu_percent"] is None
+    assert rows[1]["io_bytes_per_sec"] is None
+    assert rows[2]["cpu_percent"] == 50.0
+
+    # ...and gets rates against its own previous tick from then on
+    host.now += 1.0
+    host.procs = [fake_proc(1, 20.0, cpu_seconds=0.75, io_bytes=10)]
+    assert sampler.sample()[0]["cpu_percent"] == 25.0
+
+
+def test_rate_rankings_wait_for_second_tick(host):
+    sampler = ProcessSampler()
+    host.procs = [fake_proc(1, 10.0, 5.0, 1000), fake_proc(2, 10.0, 1.0, 0, rss=4096)]
+    first = take_top_snapshot(sampler)
+    assert "cpu" not in first["rankings"]
+    assert "io" not in first["rankings"]
+    assert [r["pid"] for r in first["rankings"]["rss"]] == [2, 1]
+    assert first["process_count"] == 2
+
+    host.now += 1.0
+    host.procs = [fake_proc(1, 10.0, 5.5, 1000), fake_proc(2, 10.0, 2.0, 0, rss=4096)]
+    second = take_top_snapshot(sampler)
+    assert [r["pid"] for r in second["rankings"]["cpu"]] == [2, 1]
+    assert second["ranked"]["cpu"] == 2
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import os
+import uuid
+
+import pytest
+
+from shared_history import SLOT_HEADER, RingNotifier, RingSubscriber, SharedHistoryRing, notify_dir
+
+
+def sample(i):
+    return {"timestamp": 1000.0 + i, "value": i}
+
+
+@pytest.fixture
+def ring():
+    ring = SharedHistoryRing.create(f"hmd-test-{uuid.uuid4().hex[:8]}", slots=8, slot_bytes=128)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def fill(ring, count):
+    for i in range(count):
+        ring.append(sample(i))
+
+
+def tear(ring, seq):
+    """Leave a slot as the writer does mid-write"""
+    SLOT_HEADER.pack_into(ring._shm.buf, ring._offset(seq), 0, 0.0, 0)
+
+
+def test_append_and_read(ring):
+    fill(ring, 3)
+    assert ring.write_seq == 3
+    assert ring.oldest_seq == 0
+    assert [ring.read(seq) for seq in range(3)] == [sample(i) for i in range(3)]
+    assert ring.latest() == sample(2)
+
+
+def test_empty_ring(ring):
+    assert ring.latest() is None
+    assert ring.find_seq(0) == 0
+    assert ring.read_since(0) == ([], 0)
+    assert list(ring.iter_range(0)) == []
+
+
+def test_wraparound_drops_overwritten_samples(ring):
+    fill(ring, 20)
+    assert ring.write_seq == 20
+    assert ring.oldest_seq == 12
+    # Slot of seq 4 now holds seq 12
+    assert ring.read(4) is None
+    assert ring.read(12) == sample(12)
+    assert ring.latest() == sample(19)
+
+
+def test_torn_slot_is_skipped(ring):
+    fill(ring, 5)
+    tear(ring, 2)
+    assert ring.read(2) is None
+    samples, end = ring.read_since(0)
+    assert end == 5
+    assert [s["value"] for s in samples] == [0, 1, 3, 4]
+
+
+def test_non_ascii_is_stored_as_utf8(ring):
+    # 10 CJK characters: 60 bytes as \uXXXX escapes, 30 as UTF-8
+    text = "监控" * 5
+    ring.append({"timestamp": 1.0, "text": text})
+    assert ring.read(0)["text"] == text
+    assert text.encode() in ring.read_payload(0)
+
+
+def test_attached_reader_sees_writes(ring):
+    reader = SharedHistoryRing.attach(ring.name)
+    try:
+        fill(ring, 3)
+        assert reader.write_seq == 3
+        assert reader.latest() == sample(2)
+    finally:
+        reader.close()
+
+
+def test_attach_rejects_foreign_memory():
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=64)
+    try:
+        with pytest.raises(ValueError):
+            SharedHistoryRing.attach(shm.name)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_oversized_sample_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.append({"timestamp": 1.0, "blob": "x" * 200})
+    assert ring.write_seq == 0
+
+
+def test_find_seq_on_lapped_ring(ring):
+    fill(ring, 20)
+    # Older than anything still held -> oldest retained seq
+    assert ring.find_seq(0) == 12
+    assert ring.find_seq(1000.0 + 4) == 12
+    assert ring.find_seq(1000.0 + 14) == 15
+    assert ring.find_seq(1000.0 + 14.5) == 15
+    assert ring.find_seq(1000.0 + 19) == 20
+
+
+def test_find_seq_skips_torn_slot(ring):
+    fill(ring, 20)
+    tear(ring, 12)
+    assert ring.find_seq(1000.0 + 11) == 13
+    assert ring.find_seq(1000.0 + 15) == 16
+
+
+def test_read_since_after_lap(ring):
+    fill(ring, 3)
+    _, cursor = ring.read_since(0)
+    assert cursor == 3
+
+    # Reader falls behind by more than a full lap
+    for i in range(3, 23):
+        ring.append(sample(i))
+    samples, cursor = ring.read_since(cursor)
+    assert cursor == 23
+    assert [s["value"] for s in samples] == list(range(15, 23))
+
+    assert ring.read_since(cursor) == ([], 23)
+
+
+def test_read_range_step(ring):
+    fill(ring, 20)
+    assert [s["value"] for s in ring.read_range(0, 20)] == list(range(12, 20))
+    assert [s["value"] for s in ring.read_range(12, 20, step=3)] == [12, 15, 18]
+
+
+def test_read_range_payloads_are_stored_json(ring):
+    fill(ring, 5)
+    tear(ring, 3)
+    payloads = ring.read_range_payloads(0, 5, step=1)
+    assert [json.loads(p) for p in payloads] == [sample(i) for i in (0, 1, 2, 4)]
+
+
+def test_iter_range_bounds(ring):
+    fill(ring, 20)
+    values = [s["value"] for s in ring.iter_range(1000.0 + 13, 1000.0 + 17)]
+    assert values == [14, 15, 16, 17]
+    assert [s["value"] for s in ring.iter_range(0)] == list(range(12, 20))
+
+
+def test_subscriber_wakes_on_notify():
+    name = f"hmd-test-{uuid.uuid4().hex[:8]}"
+    os.makedirs(notify_dir(name))
+    subscriber = RingSubscriber(name)
+    notifier = RingNotifier(name)
+
+    async def scenario():
+        assert await subscriber.wait(0.05) is False
+        # Queued wake-ups collapse into one
+        notifier.notify()
+        notifier.notify()
+        assert await subscriber.wait(1.0) is True
+        assert await subscriber.wait(0.05) is False
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        notifier.close()
+        subscriber.close()
+        os.rmdir(notify_dir(name))
@@ -65,6 +65,25 @@ export function ProcessCard({ process }: ProcessCardProps) {
             <span>{formatDuration(process.uptime_seconds)}</span>
           </div>
         )}
+
+        {process.probe && (
+          <div className="flex justify-between">
+            <span className="text-gray-400">Health:</span>
+            {process.probe.healthy ? (
+              <span className="text-green-400">
+                {process.probe.latency_ms}ms
+                {process.probe.p95_ms !== null && (
+                  <span className="text-gray-500"> (p95 {process.probe.p95_ms}ms)</span>
+                )}
+                {!!process.probe.failure_rate && (
+                  <span className="text-yellow-400"> {(process.probe.failure_rate * 100).toFixed(0)}% failed</span>
+                )}
+              </span>
+            ) : (
+              <span className="text-red-400">{process.probe.error ?? 'unreachable'}</span>
+            )}
+          </div>
+        )}
       </div>
     </div>
   );
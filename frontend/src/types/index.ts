@@ -10,6 +10,19 @@ export interface SystemMetrics {
   boot_time: number;
 }
 
+export interface ProbeStatus {
+  kind: string;
+  port: number | null;
+  healthy: boolean;
+  latency_ms: number | null;
+  error: string | null;
+  p50_ms: number | null;
+  p95_ms: number | null;
+  p99_ms: number | null;
+  failure_rate: number | null;
+  samples: number;
+}
+
 export interface ProcessInfo {
   name: string;
   running: boolean;
@@ -18,6 +31,7 @@ export interface ProcessInfo {
   cpu_percent: number | null;
   memory_percent: number | null;
   uptime_seconds: number | null;
+  probe?: ProbeStatus | null;
 }
 
 export interface ProcessMetrics {